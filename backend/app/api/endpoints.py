@@ -4,7 +4,7 @@ from fastapi.responses import StreamingResponse
 from langchain_core.messages import HumanMessage
 
 from app.api.schemas import ChatRequest, ChatResponse
-from app.core.graph import app as agent_app # 导入你编排好的图
+from app.core.graph import get_app # 导入你编排好的图 (懒加载)
 from app.core.logger import logger
 
 router = APIRouter()
@@ -21,8 +21,18 @@ async def event_generator(query: str, thread_id: str):
     }
 
     try:
+        agent_app = await get_app()
         # 使用 astream 监听图的执行过程
-        async for event in agent_app.astream(inputs, config=config):
+        # updates: 节点完成事件；messages: 生成节点的 LLM token 流
+        async for mode, event in agent_app.astream(inputs, config=config, stream_mode=["updates", "messages"]):
+
+            # 0. 转发生成节点的 token，降低首字延迟
+            if mode == "messages":
+                chunk, metadata = event
+                if metadata.get("langgraph_node") == "generate" and chunk.content:
+                    payload = {"type": "token", "node": "generate", "content": chunk.content}
+                    yield f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+                continue
             
             # 1. 监听节点完成事件
             for node_name, state_update in event.items():
@@ -79,6 +89,7 @@ async def chat_sync(request: ChatRequest):
     config = {"configurable": {"thread_id": request.thread_id}}
     
     try:
+        agent_app = await get_app()
         final_state = await agent_app.ainvoke(
             {"query": request.query, "messages": [HumanMessage(content=request.query)]},
             config=config
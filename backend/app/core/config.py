@@ -12,6 +12,7 @@ class Settings(BaseSettings):
     # --- 基础路径配置 ---
     BASE_DIR: Path = BACKEND_DIR
     LOG_DIR: Path = BACKEND_DIR / "logs"
+    CHECKPOINT_DB: Path = BACKEND_DIR / "checkpoints.db"  # LangGraph 会话记忆持久化
     
     # --- 模型提供商 ---
     LLM_BASE_URL: str = "https://api.openai.com/v1" 
@@ -42,6 +43,10 @@ class Settings(BaseSettings):
     QDRANT_API_KEY: str | None = None
     COLLECTION_NAME: str = "test-collectin"
 
+    # --- 检索配置 ---
+    # 开启后用抽取出的原始实体名与 Qdrant 并发查询 Neo4j；关闭则严格串行 (先 Qdrant 后 Neo4j)
+    GRAPH_SPECULATIVE_SEED: bool = True
+
     # --- Pydantic 魔法配置 ---
     model_config = SettingsConfigDict(
         env_file=BACKEND_DIR / ".env",  # 定位 .env
@@ -1,8 +1,13 @@
-from typing import Literal
+import asyncio
+from contextlib import AsyncExitStack
+from typing import Literal, Optional
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 
+from app.core.config import settings
 from app.core.state import AgentState
+from app.core.nodes.summarization import summarization_node
 from app.core.nodes.retrieval import retrieve_node
 from app.core.nodes.generation import generation_node
 from app.core.nodes.validation import validation_node
@@ -41,12 +46,14 @@ def router_logic(state: AgentState) -> Literal["retrieve", "generate", END]:
 workflow = StateGraph(AgentState)
 
 # 2. 添加节点
+workflow.add_node("summarize", summarization_node)
 workflow.add_node("retrieve", retrieve_node)
 workflow.add_node("generate", generation_node)
 workflow.add_node("validate", validation_node)
 
 # 3. 设置基础边
-workflow.set_entry_point("retrieve")
+workflow.set_entry_point("summarize")
+workflow.add_edge("summarize", "retrieve")
 workflow.add_edge("retrieve", "generate")
 workflow.add_edge("generate", "validate")
 
@@ -62,7 +69,30 @@ workflow.add_conditional_edges(
 )
 
 # 5. 编译
-memory = MemorySaver()
-app = workflow.compile(checkpointer=memory)
+# AsyncSqliteSaver 必须在运行中的事件循环里创建，因此图在首次使用时才编译 (会话记忆持久化到 SQLite)
+_app: Optional[CompiledStateGraph] = None
+_exit_stack: Optional[AsyncExitStack] = None
+_init_lock = asyncio.Lock()
 
-__all__ = ["app"]
\ No newline at end of file
+async def get_app() -> CompiledStateGraph:
+    """获取编译好的图 (懒加载，全局复用同一个 SQLite 连接)"""
+    global _app, _exit_stack
+    async with _init_lock:
+        if _app is None:
+            stack = AsyncExitStack()
+            memory = await stack.enter_async_context(
+                AsyncSqliteSaver.from_conn_string(str(settings.CHECKPOINT_DB))
+            )
+            _app = workflow.compile(checkpointer=memory)
+            _exit_stack = stack
+    return _app
+
+async def close_app():
+    """关闭 checkpointer 的 SQLite 连接"""
+    global _app, _exit_stack
+    async with _init_lock:
+        if _exit_stack is not None:
+            await _exit_stack.aclose()
+        _app, _exit_stack = None, None
+
+__all__ = ["get_app", "close_app"]
@@ -1,4 +1,6 @@
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.messages import trim_messages
+from langchain_core.messages.utils import count_tokens_approximately
 from typing import Dict, Any
 
 from app.core.state import AgentState
@@ -10,6 +12,9 @@ from app.core.logger import logger
 llm = llm_factory.get_llm(mode="smart")
 chain = rag_generation_prompt | llm | StrOutputParser()
 
+# 每轮发送给 LLM 的历史对话 token 上限 (近似计数，不依赖具体模型的 tokenizer)
+HISTORY_MAX_TOKENS = 2000
+
 async def generation_node(state: AgentState) -> Dict[str, Any]:
     logger.info("🧠 [GENERATION] 生成中...")
     
@@ -22,12 +27,27 @@ async def generation_node(state: AgentState) -> Dict[str, Any]:
     current_context = state.get("rag_context", "") + feedback
 
     try:
-        response = await chain.ainvoke({
+        # 按 token 预算保留最近的历史，开头的摘要 SystemMessage 始终保留
+        history = trim_messages(
+            state.get("messages", []),
+            max_tokens=HISTORY_MAX_TOKENS,
+            strategy="last",
+            token_counter=count_tokens_approximately,
+            include_system=True,
+            start_on="human"
+        )
+
+        # 流式生成：token 经 LangGraph 的 "messages" 流模式实时推给客户端，这里只负责拼接完整回答
+        chunks = []
+        async for chunk in chain.astream({
             "context": current_context, # 传入带反馈的上下文
-            "messages": state.get("messages", []),
+            "messages": history,
             "question": state["query"]
-        })
+        }):
+            chunks.append(chunk)
+        response = "".join(chunks)
         logger.info(f"🧠 [GENERATION] 生成完成: {response}")
         return {"answer": response}
     except Exception as e:
+        logger.error(f"❌ [GENERATION] 生成失败: {e}")
         return {"answer": "生成出错"}
\ No newline at end of file
@@ -1,15 +1,25 @@
+import asyncio
 from typing import Dict, Any
 from app.core.state import AgentState
 import app.services.hybrid_search as search_service 
+from app.services.llm_factory import llm_factory
 
 from app.core.logger import logger
 
+# 持有后台任务引用，防止被垃圾回收
+_background_tasks = set()
+
 async def retrieve_node(state: AgentState) -> Dict[str, Any]:
     """
     🔍 检索节点
     """
     query = state["query"]
     logger.info(f"🔍 [RETRIEVAL] 开始检索: {query}")
+
+    # 检索期间后台预热 LLM 连接，生成节点开始时直接复用
+    task = asyncio.create_task(llm_factory.warmup())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
     
     try:
         # ✅ 运行时动态从模块中获取最新的 service 实例
@@ -18,8 +28,9 @@ async def retrieve_node(state: AgentState) -> Dict[str, Any]:
         if service is None:
             raise ValueError("HybridSearchService 尚未初始化！")
 
-        # 调用混合检索服务
-        result = await service.search(query)
+        # 调用混合检索服务；校验节点要求重新检索时跳过缓存，否则只会拿回同一份上下文
+        retry_retrieval = state.get("validation_status") == "retry_retrieval"
+        result = await service.search(query, use_cache=not retry_retrieval)
         
         entities = result.get("entities", [])
         graph_ctx = result.get("graph_context", "")
@@ -0,0 +1,53 @@
+from typing import Dict, Any
+from langchain_core.messages import RemoveMessage, SystemMessage
+from langchain_core.output_parsers import StrOutputParser
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+from app.core.state import AgentState
+from app.services.llm_factory import llm_factory
+from app.prompts.summarization import history_summary_prompt
+from app.core.logger import logger
+
+# 历史消息超过该条数时触发压缩
+MAX_HISTORY_MESSAGES = 20
+# 每次压缩最早的若干条消息
+SUMMARIZE_BATCH = 10
+
+# 本节点是每轮的入口 (重试只回到 retrieve/generate)，在此清空上一轮的校验结果，
+# 避免 checkpointer 持久化的 retry_retrieval 等状态影响新一轮的检索缓存与重试计数
+TURN_RESET = {
+    "validation_status": "",
+    "validation_reason": "",
+    "retry_count": 0
+}
+
+llm = llm_factory.get_llm(mode="fast")
+chain = history_summary_prompt | llm | StrOutputParser()
+
+async def summarization_node(state: AgentState) -> Dict[str, Any]:
+    """
+    🗜️ 历史压缩节点：把最早的对话折叠成一条摘要 SystemMessage，控制每轮发送给 LLM 的 token 数；
+    同时重置上一轮的校验状态
+    """
+    messages = state.get("messages", [])
+    if len(messages) <= MAX_HISTORY_MESSAGES:
+        return dict(TURN_RESET)
+
+    old, recent = messages[:SUMMARIZE_BATCH], messages[SUMMARIZE_BATCH:]
+    logger.info(f"🗜️ [SUMMARIZE] 历史消息 {len(messages)} 条，压缩最早的 {len(old)} 条")
+
+    try:
+        summary = await chain.ainvoke({"messages": old})
+    except Exception as e:
+        logger.warning(f"历史压缩失败，保留原始历史: {e}")
+        return dict(TURN_RESET)
+
+    # 摘要需要排在最前面，因此清空后按顺序重建消息列表
+    return {
+        **TURN_RESET,
+        "messages": [
+            RemoveMessage(id=REMOVE_ALL_MESSAGES),
+            SystemMessage(content=f"【历史对话摘要】\n{summary}"),
+            *recent
+        ]
+    }
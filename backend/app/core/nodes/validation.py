@@ -18,7 +18,8 @@ class ValidationResult(BaseModel):
 
 llm = llm_factory.get_llm(mode="smart")
 parser = PydanticOutputParser(pydantic_object=ValidationResult)
-chain = validation_prompt | llm | parser
+# 格式说明是固定的，编译期填入 Prompt，避免每次调用重新生成 JSON Schema
+chain = validation_prompt.partial(format_instructions=parser.get_format_instructions()) | llm | parser
 
 async def validation_node(state: AgentState) -> Dict[str, Any]:
     logger.info("⚖️ [VALIDATION] 正在评估...")
@@ -31,7 +32,6 @@ async def validation_node(state: AgentState) -> Dict[str, Any]:
             "question": state["query"],
             "answer": state["answer"],
             "context": state.get("rag_context", ""),
-            "format_instructions": parser.get_format_instructions() 
         })
         
         logger.info(f"   - 动作: {score.action} | 理由: {score.reason} | 重试: {current_retry}")
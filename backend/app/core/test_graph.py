@@ -1,68 +1,99 @@
 import asyncio
 from langchain_core.messages import HumanMessage
-from app.core.graph import app
+from app.core.graph import get_app, close_app
 
 # ✅ 1. 必须导入初始化函数
 from app.services.hybrid_search import init_hybrid_search
+from app.services.llm_factory import llm_factory
+from app.services.embedding_factory import embedding_factory
 
-async def test_full_flow():
-    # ✅ 2. 在测试开始前，手动初始化服务
-    # 因为这里没有 FastAPI 的 lifespan 帮你自动执行
-    print("⚙️ [系统启动] 正在初始化 Hybrid Search Service...")
-    init_hybrid_search()
-    print("✅ [系统启动] 初始化完成\n")
+async def warmup():
+    """
+    预热模型连接：并发发出极小的请求，把 TCP/TLS 握手和冷启动藏在正式提问之前
+    """
+    print("🔥 [系统启动] 正在预热 LLM / Embedding 连接...")
+    results = await asyncio.gather(
+        llm_factory.get_llm(mode="smart").ainvoke("ping"),
+        embedding_factory.get_embedding().aembed_query("ping"),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"⚠️ [系统启动] 预热失败 (不影响测试): {result}")
 
-    # 模拟用户 session
-    config = {"configurable": {"thread_id": "test_user_007"}}
-    
-    # 📝 测试 1: 正常问题
-    query = "马斯克的太空公司是什么"
-    print(f"{'='*50}\n🧠 用户提问: {query}\n{'='*50}")
-    
+async def run_turn(label: str, query: str, config: dict, show_tokens: bool = True):
+    """执行一轮对话并打印每个步骤，返回最终回答"""
+    app = await get_app()
     inputs = {
         "query": query,
         "messages": [HumanMessage(content=query)]
     }
-    
-    # 流式运行，查看每个步骤
-    async for event in app.astream(inputs, config=config):
+
+    # 流式运行，查看每个步骤 (messages 模式实时打印生成节点的 token)
+    async for mode, event in app.astream(inputs, config=config, stream_mode=["updates", "messages"]):
+        if mode == "messages":
+            chunk, metadata = event
+            if show_tokens and metadata.get("langgraph_node") == "generate":
+                print(chunk.content, end="", flush=True)
+            continue
+
         for node, values in event.items():
-            print(f"✅ 节点完成: [{node}]")
-            
+            print(f"[{label}] ✅ 节点完成: [{node}]")
+
             # 👇 更新打印逻辑，适配新的 Router 逻辑
             if node == "validate":
                 status = values.get('validation_status') # 可能是 pass, retry_retrieval 等
                 reason = values.get('validation_reason')
                 retry = values.get('retry_count', 0)
-                
-                print(f"   👉 校验动作: {status}")
-                print(f"   👉 校验理由: {reason}")
-                print(f"   🔄 重试次数: {retry}")
-    
+
+                print(f"[{label}]    👉 校验动作: {status}")
+                print(f"[{label}]    👉 校验理由: {reason}")
+                print(f"[{label}]    🔄 重试次数: {retry}")
+
     # 获取最终状态
     state = await app.aget_state(config)
     # 注意：有可能最后是强制结束的，所以要在取值前判断一下
-    final_ans = state.values.get('answer', '无回答')
-    print(f"\n🤖 最终回答: {final_ans}")
-    
+    return state.values.get('answer', '无回答')
+
+async def memory_session():
+    """会话 A：提问 + 追问 (测试记忆)，两轮之间有依赖，必须串行"""
+    config = {"configurable": {"thread_id": "test_user_007"}}
+
+    # 📝 测试 1: 正常问题
+    query = "马斯克的太空公司是什么"
+    print(f"{'='*50}\n🧠 [A] 用户提问: {query}\n{'='*50}")
+    answer = await run_turn("A", query, config)
+    print(f"\n🤖 [A] 最终回答: {answer}")
+
     # 📝 测试 2: 追问 (测试记忆)
     query2 = "它有什么著名的火箭？"
-    print(f"\n\n{'='*50}\n🧠 用户追问: {query2}\n{'='*50}")
-    
-    inputs2 = {
-        "query": query2,
-        "messages": [HumanMessage(content=query2)]
-    }
-    
-    async for event in app.astream(inputs2, config=config):
-        for node, values in event.items():
-            # 简略输出节点名，证明流在动
-            print(f"✅ 节点完成: [{node}]")
-            if node == "validate":
-                 print(f"   👉 状态: {values.get('validation_status')}")
-        
-    state2 = await app.aget_state(config)
-    print(f"\n🤖 最终回答: {state2.values.get('answer')}")
+    print(f"\n\n{'='*50}\n🧠 [A] 用户追问: {query2}\n{'='*50}")
+    answer2 = await run_turn("A", query2, config)
+    print(f"\n🤖 [A] 最终回答: {answer2}")
+
+async def independent_session():
+    """会话 B：与会话 A 无关的独立问题，使用不同的 thread_id 并发执行"""
+    config = {"configurable": {"thread_id": "test_user_008"}}
+
+    query = "特斯拉在中国建厂了吗"
+    print(f"{'='*50}\n🧠 [B] 用户提问: {query}\n{'='*50}")
+    # 两个会话并发时 token 会交错，B 只打印最终结果
+    answer = await run_turn("B", query, config, show_tokens=False)
+    print(f"\n🤖 [B] 最终回答: {answer}")
+
+async def test_full_flow():
+    # ✅ 2. 在测试开始前，手动初始化服务
+    # 因为这里没有 FastAPI 的 lifespan 帮你自动执行
+    print("⚙️ [系统启动] 正在初始化 Hybrid Search Service...")
+    init_hybrid_search()
+    await warmup()
+    print("✅ [系统启动] 初始化完成\n")
+
+    # 独立会话并发运行，I/O 等待相互重叠
+    try:
+        await asyncio.gather(memory_session(), independent_session())
+    finally:
+        await close_app()
 
 if __name__ == "__main__":
-    asyncio.run(test_full_flow())
\ No newline at end of file
+    asyncio.run(test_full_flow())
@@ -7,6 +7,7 @@ from app.core.logger import logger
 from app.api.endpoints import router as chat_router
 from app.api.monitor import router as monitor_router
 from app.services.hybrid_search import init_hybrid_search
+from app.core.graph import get_app, close_app
 from app.core.config import settings
 
 @asynccontextmanager
@@ -14,6 +15,8 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 服务启动中...")
     
     init_hybrid_search()
+    # 在事件循环内编译图并打开 checkpointer 的 SQLite 连接
+    await get_app()
     
     try:
         from app.services.qdrant_service import qdrant_manager
@@ -34,6 +37,16 @@ async def lifespan(app: FastAPI):
         logger.warning("⚠️ 同步失败，但服务正常启动（可通过 API 手动同步）")
     
     yield
+
+    from app.services.neo4j_service import neo4j_manager
+    from app.services.qdrant_service import qdrant_manager
+    from app.services.llm_factory import llm_factory
+    if neo4j_manager:
+        await neo4j_manager.aclose()
+    if qdrant_manager:
+        await qdrant_manager.aclose()
+    await llm_factory.http_async_client.aclose()
+    await close_app()
     logger.info("🛑 服务关闭")
 
 app = FastAPI(title="Agentic GraphRAG", lifespan=lifespan)
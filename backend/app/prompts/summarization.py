@@ -0,0 +1,15 @@
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+# 历史对话压缩 Prompt
+history_summary_prompt = ChatPromptTemplate.from_messages([
+    ("system", """你是一个对话记录整理助手。请将下面的历史对话压缩为一段简洁的摘要。
+
+【摘要要求】
+1. 保留用户关心的实体、问题以及 AI 给出的关键结论。
+2. 如果历史中已有摘要，请将其与新对话合并，不要丢失信息。
+3. 只输出摘要正文，不要添加额外说明。
+"""),
+    # 需要压缩的历史对话
+    MessagesPlaceholder(variable_name="messages"),
+    ("user", "请输出以上对话的摘要。")
+])
@@ -2,7 +2,6 @@ import asyncio
 from typing import List
 from langchain_core.documents import Document
 from langchain_qdrant import QdrantVectorStore
-from qdrant_client import models  # ✅ 引入 models
 
 from app.services.neo4j_service import neo4j_manager
 from app.services.qdrant_service import qdrant_manager
@@ -58,13 +57,7 @@ class DataSyncService:
         # 总是确保集合存在
         if not client.collection_exists(self.collection_name):
             try:
-                client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=models.VectorParams(
-                        size=settings.EMBD_DIMENSIONS,
-                        distance=models.Distance.COSINE
-                    )
-                )
+                qdrant_manager.create_entity_collection(self.collection_name)
                 logger.success(f"✅ 创建新集合: {self.collection_name} (维度: {settings.EMBD_DIMENSIONS})")
             except Exception as e:
                 logger.error(f"❌ 创建集合失败: {e}")
@@ -78,13 +71,7 @@ class DataSyncService:
                     logger.info(f"🗑️ 清空 {collection_info.points_count} 条旧数据")
                     client.delete_collection(self.collection_name)
                     # 重新创建
-                    client.create_collection(
-                        collection_name=self.collection_name,
-                        vectors_config=models.VectorParams(
-                            size=settings.EMBD_DIMENSIONS,
-                            distance=models.Distance.COSINE
-                        )
-                    )
+                    qdrant_manager.create_entity_collection(self.collection_name)
             except Exception as e:
                 logger.warning(f"⚠️ 清空失败，继续使用: {e}")
         
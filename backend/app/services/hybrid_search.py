@@ -1,67 +1,131 @@
 import asyncio
-from typing import List, Dict, Any
-from pydantic import BaseModel, Field
+import hashlib
+from array import array
+import heapq
+import re
+from functools import cached_property
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+import orjson
+from pydantic import BaseModel, Field, ValidationError
+from cachetools import LRUCache, TTLCache
 from langchain_qdrant import QdrantVectorStore
 from qdrant_client import models
 from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.outputs import Generation
 
 from app.services.embedding_factory import embedding_factory
 from app.services.llm_factory import llm_factory
 from app.services.neo4j_service import neo4j_manager
-from app.services.qdrant_service import qdrant_manager
+from app.services.qdrant_service import qdrant_manager, ENTITY_TYPE_FIELD
 from app.prompts.extraction import entity_extraction_prompt
 from app.core.logger import logger
 from app.core.config import settings
 
+# 每个实体在 Qdrant 中召回的候选数
+PER_ENTITY_LIMIT = 2
+# 实体向量缓存容量 (高频实体如 "SpaceX"、"马斯克" 无需重复 Embedding)，float32 存储约 16MiB
+EMBEDDING_CACHE_SIZE = 1024
+# 查询时的 HNSW 搜索宽度 (精度/延迟权衡)
+HNSW_EF = 64
+# 两阶段检索：INT8 粗排候选数 = 最终条数 × 该倍数，再用原始向量精排
+PREFETCH_MULTIPLIER = 4
+# 整体检索结果缓存 (FAQ 类重复提问直接命中)
+SEARCH_CACHE_SIZE = 2048
+SEARCH_CACHE_TTL = 300  # 秒
+# 注入上下文的图谱关系上限
+GRAPH_RELATION_LIMIT = 15
+
+# 短查询快速通道：像实体名的短输入 (如 "SpaceX"、"马斯克") 本身就是实体，跳过 LLM 抽取
+TRIVIAL_QUERY_MAX_LEN = 24
+TRIVIAL_QUERY_MAX_CJK_LEN = 10  # 中文没有空格，按字数单独限制
+TRIVIAL_QUERY_MAX_WORDS = 3
+# 短查询整体作为实体时，最佳匹配的余弦相似度须达到该值才采纳；否则 (如 "继续"、"hello") 回退 LLM 抽取
+TRIVIAL_QUERY_MIN_SCORE = 0.8
+# 含疑问词/虚词说明是问句而不是实体名
+TRIVIAL_QUERY_MARKERS = (
+    "?", "？", "的", "了", "吗", "呢", "是", "谁", "什么", "哪", "怎么", "如何", "为什么", "多少", "几"
+)
+TRIVIAL_QUERY_QUESTION_WORDS = frozenset({
+    "what", "who", "whom", "whose", "which", "where", "when", "why", "how",
+    "is", "are", "was", "were", "do", "does", "did", "can", "could", "should", "tell"
+})
+_CJK_PATTERN = re.compile(r"[\u4e00-\u9fff]")
+# 实体名字段 / 展开 LLM 输出时跳过的元数据字段 (类型标签、描述不是实体)
+ENTITY_NAME_KEYS = ("name", "entity", "entity_name")
+ENTITY_METADATA_KEYS = frozenset({
+    "type", "entity_type", "label", "labels", "category", "description", "desc"
+})
+
+
+def _is_trivial_query(query: str) -> bool:
+    query = query.strip()
+    if not 0 < len(query) < TRIVIAL_QUERY_MAX_LEN:
+        return False
+    if _CJK_PATTERN.search(query) and len(query) > TRIVIAL_QUERY_MAX_CJK_LEN:
+        return False
+    words = query.lower().split()
+    return (
+        len(words) <= TRIVIAL_QUERY_MAX_WORDS
+        and not any(w in TRIVIAL_QUERY_QUESTION_WORDS for w in words)
+        and not any(m in query for m in TRIVIAL_QUERY_MARKERS)
+    )
+
 # --- 数据结构定义 ---
+def _walk_entities(node: Any) -> Iterator[str]:
+    """递归遍历 LLM 输出，产出其中的实体名"""
+    if isinstance(node, str):
+        yield node
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk_entities(item)
+    elif isinstance(node, dict):
+        # 实体对象 {"name": "...", "type": "..."} 只取名字 (名字须为非空字符串)
+        name = next((v for v in map(node.get, ENTITY_NAME_KEYS) if isinstance(v, str) and v.strip()), None)
+        if name is not None:
+            yield name
+            return
+        # 分类字典 {"person": [...]} / {"entity": [...]} 继续展开，跳过类型、描述等元数据
+        for key, value in node.items():
+            if key.lower() not in ENTITY_METADATA_KEYS:
+                yield from _walk_entities(value)
+
+
 class ExtractionFormat(BaseModel):
     entities: Any = Field(..., description="实体列表")
     
-    @property
+    @cached_property
     def flat_entities(self) -> List[str]:
-        """🦾 智能适配所有可能的 DeepSeek 输出格式"""
-        entities_raw = self.entities
-        
-        # 情况1：直接是字符串列表
-        if isinstance(entities_raw, list) and all(isinstance(e, str) for e in entities_raw):
-            return [e.strip() for e in entities_raw if e.strip()]
-        
-        # 情况2：实体对象数组 [{"name": "...", "type": "..."}]
-        elif isinstance(entities_raw, list):
-            all_names = []
-            for item in entities_raw:
-                if isinstance(item, dict):
-                    all_names.append(item.get("name", "") or item.get("entity", ""))
-                elif isinstance(item, str):
-                    all_names.append(item)
-            return [e.strip() for e in all_names if e.strip()]
-        
-        # 情况3：分类字典 {"person": [...], "company": [...]}
-        elif isinstance(entities_raw, dict):
-            all_entities = []
-            for category, items in entities_raw.items():
-                if isinstance(items, list):
-                    for item in items:
-                        if isinstance(item, str):
-                            all_entities.append(item)
-                        elif isinstance(item, dict):
-                            all_entities.append(item.get("name", "") or item.get("entity", ""))
-            return [e.strip() for e in all_entities if e.strip()]
-        
-        return []
+        """🦾 智能适配所有可能的 DeepSeek 输出格式 (字符串列表 / 实体对象数组 / 分类字典)"""
+        return [s for s in (e.strip() for e in _walk_entities(self.entities)) if s]
+
+class OrjsonExtractionParser(PydanticOutputParser):
+    """用 orjson 解析实体抽取结果；解析失败时回退到 LangChain 默认解析 (兼容代码块等非标准输出)"""
+
+    def parse_result(self, result: List[Generation], *, partial: bool = False) -> Any:
+        text = result[0].text
+        start, end = text.find("{"), text.rfind("}")
+        if start != -1 and end > start:
+            try:
+                return self.pydantic_object.model_validate(orjson.loads(text[start:end + 1]))
+            except (orjson.JSONDecodeError, ValidationError):
+                pass
+        return super().parse_result(result, partial=partial)
 
 class HybridSearchService:
     def __init__(self):
         self.embeddings = embedding_factory.get_embedding()
-        self.qdrant_vectorstore = None
+        self.qdrant_client = None
+        self.aclient = qdrant_manager.get_async_client()
         self.neo4j_driver = neo4j_manager
+        self._embedding_cache: LRUCache = LRUCache(maxsize=EMBEDDING_CACHE_SIZE)
+        self._search_cache: TTLCache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
         
         # 1. 初始化 Qdrant
         self._init_qdrant()
         
         # 2. 初始化提取器 components
         # 我们把 Parser 存为成员变量，以便后续获取 instructions
-        self.extraction_parser = PydanticOutputParser(pydantic_object=ExtractionFormat)
+        self.extraction_parser = OrjsonExtractionParser(pydantic_object=ExtractionFormat)
         self.extraction_chain = self._init_extraction()
         
         logger.success("✅ HybridSearch初始化完成")
@@ -73,36 +137,64 @@ class HybridSearchService:
         
         if not client.collection_exists(collection_name):
             try:
-                dummy_vec = self.embeddings.embed_query("test")
-                vector_size = len(dummy_vec)
-                client.create_collection(
-                    collection_name=collection_name,
-                    vectors_config=models.VectorParams(
-                        size=vector_size,
-                        distance=models.Distance.COSINE
-                    )
-                )
+                # 维度直接取配置，启动时不再为探测维度调用一次 Embedding
+                qdrant_manager.create_entity_collection(collection_name)
                 logger.success(f"✅ 已创建新集合: {collection_name}")
             except Exception as e:
                 logger.error(f"❌ Qdrant 建表失败: {e}")
 
-        self.qdrant_vectorstore = QdrantVectorStore(
-            client=client,
-            collection_name=collection_name,
-            embedding=self.embeddings
-        )
+        # 幂等，旧集合也会补上过滤字段索引
+        qdrant_manager.create_payload_indexes(collection_name)
+
+        # 检索直接走 query_batch_points，不再持有 LangChain VectorStore (写入由 data_sync 负责)
+        self.qdrant_client = client
 
     def _init_extraction(self):
-        """初始化提取链：Prompt | LLM | Parser"""
+        """初始化提取链：Prompt | LLM | Parser (格式说明只生成一次，预先填入 Prompt)"""
         llm = llm_factory.get_llm(mode="fast")
-        # 构造 LCEL Chain
-        # 注意：这里我们使用了之前保存的 self.extraction_parser
-        chain = entity_extraction_prompt | llm | self.extraction_parser
-        return chain
-
-    async def search(self, query: str, top_k: int = 5) -> Dict[str, Any]:
-        # Step 1: LLM抽实体
-        entities = await self._extract_entities(query)
+        prompt = entity_extraction_prompt.partial(
+            format_instructions=self.extraction_parser.get_format_instructions()
+        )
+        return prompt | llm | self.extraction_parser
+
+    async def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        entity_type: Optional[str] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        混合检索入口
+        
+        Args:
+            entity_type: 可选的实体类型过滤 (对应 Neo4j 标签，如 "Person")，在 Qdrant 服务端过滤
+            use_cache: 为 False 时跳过缓存重新检索 (校验要求重新检索时使用)，并用新结果刷新缓存
+        """
+        digest = hashlib.blake2b(query.strip().lower().encode("utf-8"), digest_size=16).digest()
+        cache_key = (digest, top_k, entity_type)
+        if use_cache:
+            cached = self._search_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"⚡ 检索缓存命中: {query}")
+                return dict(cached)
+        else:
+            self._search_cache.pop(cache_key, None)
+
+        result, cacheable = await self._search(query, top_k, entity_type)
+        if cacheable:
+            self._search_cache[cache_key] = result
+        return dict(result)
+
+    async def _search(self, query: str, top_k: int, entity_type: Optional[str]) -> Tuple[Dict[str, Any], bool]:
+        """执行完整检索，返回 (结果, 是否可缓存)；实体匹配为空或图谱查询失败时不缓存，避免把临时故障缓存下来"""
+        # Step 1: LLM抽实体 (短查询先整体匹配实体库，命中足够相似的实体才跳过抽取)
+        matched_entities = await self._match_trivial_query(query, top_k, entity_type)
+        if matched_entities:
+            entities = [query.strip()]
+            logger.info(f"⚡ 短查询快速通道，跳过实体抽取: {entities}")
+        else:
+            entities = await self._extract_entities(query)
         
         if not entities:
             logger.info("未提取到实体，fallback 到纯向量检索")
@@ -111,15 +203,21 @@ class HybridSearchService:
                 "entities": [],
                 "matched_entities": [],
                 "graph_context": "无实体"
-            }
-        
-        # Step 2: Qdrant找相似实体
-        matched_entities = await self._qdrant_match_entities(entities, top_k)
+            }, False
         
+        # Step 2 + 3: Qdrant找相似实体 & Neo4j查图信息
+        if matched_entities:
+            # 快速通道已拿到 Qdrant 匹配结果，直接用规范实体名查图谱
+            relations = await self._neo4j_get_relations([e["name"] for e in matched_entities[:3]])
+        elif settings.GRAPH_SPECULATIVE_SEED:
+            matched_entities, relations = await self._match_and_seed_graph(entities, top_k, entity_type)
+        else:
+            matched_entities = await self._qdrant_match_entities(entities, top_k, entity_type)
+            relations = await self._neo4j_get_relations([e["name"] for e in matched_entities[:3]])
+
         logger.info(f"🔍 [RETRIEVAL]: 匹配到实体: {matched_entities}")
-        
-        # Step 3: Neo4j查图信息
-        graph_context = await self._neo4j_get_graph(matched_entities)
+
+        graph_context = self._format_graph(relations)
 
         logger.info(f"🔍 [RETRIEVAL]: 查找到图谱关系: {graph_context}")
 
@@ -130,12 +228,26 @@ class HybridSearchService:
             context_parts.append(f"涉及实体：{', '.join(names)}")
         if graph_context:
             context_parts.append(f"知识图谱关系：\n{graph_context}")
-        return {
+        result = {
             "context_text": "\n".join(context_parts),
             "entities": entities,
             "matched_entities": matched_entities,
             "graph_context": graph_context
         }
+        return result, bool(matched_entities) and relations is not None
+
+    async def _match_trivial_query(self, query: str, top_k: int, entity_type: Optional[str]) -> List[Dict]:
+        """短查询快速通道：把整个查询当作实体匹配，最佳得分低于阈值时返回空列表 (交给 LLM 抽取)"""
+        if not _is_trivial_query(query):
+            return []
+
+        matched_entities = await self._qdrant_match_entities([query.strip()], top_k, entity_type)
+        if matched_entities and matched_entities[0]["score"] >= TRIVIAL_QUERY_MIN_SCORE:
+            return matched_entities
+
+        best = matched_entities[0]["score"] if matched_entities else None
+        logger.info(f"短查询未命中实体库 (最佳得分: {best})，回退 LLM 实体抽取: {query}")
+        return []
 
     async def _extract_entities(self, query: str) -> List[str]:
         """LLM实体提取"""
@@ -144,7 +256,6 @@ class HybridSearchService:
             result: ExtractionFormat = await self.extraction_chain.ainvoke({
                 "query": query,
                 "text": query, # 这里假设 text 就是 query 本身
-                "format_instructions": self.extraction_parser.get_format_instructions()
             })
             
             entities = result.flat_entities
@@ -154,28 +265,88 @@ class HybridSearchService:
             logger.warning(f"实体提取失败: {e}")
             return []
 
-    async def _qdrant_match_entities(self, entities: List[str], top_k: int) -> List[Dict]:
-        if not self.qdrant_vectorstore or not entities:
+    async def _embed_entities(self, entities: List[str]) -> List[List[float]]:
+        """实体向量化：命中缓存直接返回，未命中的合并为一次批量 Embedding (只有缓存 key 做归一化)"""
+        keys = [e.strip().lower() for e in entities]
+
+        # 先取出命中的向量再 await，避免并发请求期间被 LRU 淘汰
+        vectors: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        for key, entity in zip(keys, entities):
+            if key in vectors or key in missing:
+                continue
+            cached = self._embedding_cache.get(key)
+            if cached is not None:
+                vectors[key] = cached.tolist()
+            else:
+                missing[key] = entity.strip()
+
+        if missing:
+            embedded = await self.embeddings.aembed_documents(list(missing.values()))
+            for key, vec in zip(missing, embedded):
+                vectors[key] = vec
+                # float32 存储，单条 4096 维约 16KiB
+                self._embedding_cache[key] = array("f", vec)
+            logger.debug(f"Embedding 缓存未命中: {list(missing.values())}")
+
+        return [vectors[k] for k in keys]
+
+    async def _query_batch(self, requests: List[models.QueryRequest]) -> List[models.QueryResponse]:
+        """优先走复用的异步客户端；本地模式下在线程中调用同步客户端"""
+        if self.aclient:
+            return await self.aclient.query_batch_points(
+                collection_name=settings.COLLECTION_NAME,
+                requests=requests
+            )
+        return await asyncio.to_thread(
+            self.qdrant_client.query_batch_points,
+            collection_name=settings.COLLECTION_NAME,
+            requests=requests
+        )
+
+    async def _qdrant_match_entities(self, entities: List[str], top_k: int, entity_type: Optional[str] = None) -> List[Dict]:
+        if not self.qdrant_client or not entities:
+            return []
+
+        entities = entities[:3]
+        try:
+            # 一次 Embedding 调用 + 一次 Qdrant 批量查询，代替逐个实体的 N 次往返
+            vectors = await self._embed_entities(entities)
+            # 类型过滤下推到服务端，避免客户端过滤导致召回不足
+            query_filter = models.Filter(must=[
+                models.FieldCondition(key=ENTITY_TYPE_FIELD, match=models.MatchValue(value=entity_type))
+            ]) if entity_type else None
+            # 粗排只用量化向量 (不重打分)，外层 query 在同一次请求内对候选用原始向量精排
+            coarse_params = models.SearchParams(
+                hnsw_ef=HNSW_EF,
+                quantization=models.QuantizationSearchParams(rescore=False)
+            )
+            requests = [
+                models.QueryRequest(
+                    prefetch=[models.Prefetch(
+                        query=vec,
+                        filter=query_filter,
+                        params=coarse_params,
+                        limit=PER_ENTITY_LIMIT * PREFETCH_MULTIPLIER
+                    )],
+                    query=vec,
+                    limit=PER_ENTITY_LIMIT,
+                    with_payload=True
+                )
+                for vec in vectors
+            ]
+            batches = await self._query_batch(requests)
+        except Exception as e:
+            logger.warning(f"Qdrant批量检索失败: {e}")
             return []
 
-        tasks = []
-        for entity in entities[:3]:
-            # 并发查询
-            tasks.append(self.qdrant_vectorstore.asimilarity_search_with_score(entity, k=2))
-        
-        results_groups = await asyncio.gather(*tasks, return_exceptions=True)
-        
         all_results = []
-        for i, group in enumerate(results_groups):
-            if isinstance(group, Exception):
-                continue
-            
-            origin_query = entities[i]
-            for doc, score in group:
-                payload = doc.metadata
+        for origin_query, batch in zip(entities, batches):
+            for point in batch.points:
+                payload = (point.payload or {}).get(QdrantVectorStore.METADATA_KEY) or {}
                 all_results.append({
                     "name": payload.get("name", origin_query),
-                    "score": float(score),
+                    "score": float(point.score),
                     "type": payload.get("type", "unknown")
                 })
 
@@ -185,37 +356,68 @@ class HybridSearchService:
             if name not in unique_results or r["score"] > unique_results[name]["score"]:
                 unique_results[name] = r
         
-        return sorted(unique_results.values(), key=lambda x: x["score"], reverse=True)[:top_k]
+        return heapq.nlargest(top_k, unique_results.values(), key=lambda x: x["score"])
 
-    async def _neo4j_get_graph(self, matched_entities: List[Dict]) -> str:
-        if not self.neo4j_driver or not matched_entities:
+    async def _match_and_seed_graph(self, entities: List[str], top_k: int, entity_type: Optional[str] = None) -> Tuple[List[Dict], Optional[List[str]]]:
+        """
+        用抽取出的原始实体名推测性地查询 Neo4j，与 Qdrant 检索并发执行；
+        若 Qdrant 匹配到了种子之外的规范实体名，再补查一次图谱
+        """
+        seed_names = entities[:3]
+        matched_entities, relations = await asyncio.gather(
+            self._qdrant_match_entities(entities, top_k, entity_type),
+            self._neo4j_get_relations(seed_names)
+        )
+
+        extra_names = [e["name"] for e in matched_entities[:3] if e["name"] not in seed_names]
+        if extra_names:
+            logger.debug(f"Neo4j 补查规范实体: {extra_names}")
+            extra_relations = await self._neo4j_get_relations(extra_names)
+            if extra_relations is not None:
+                # 规范实体名的关系优先，种子关系补足剩余名额
+                merged = dict.fromkeys(extra_relations + (relations or []))
+                relations = list(merged)[:GRAPH_RELATION_LIMIT]
+
+        # 与串行路径保持一致：既没匹配到实体也没有图谱关系时视为无结果
+        if not matched_entities and not relations:
+            relations = None
+
+        return matched_entities, relations
+
+    @staticmethod
+    def _format_graph(relations: Optional[List[str]]) -> str:
+        """查询失败/无实体返回空串，查询成功但无关系返回提示语"""
+        if relations is None:
             return ""
-            
-        entity_names = [e["name"] for e in matched_entities[:3]]
+        if not relations:
+            return "无直接关联信息"
+        return "\n".join(relations)
+
+    async def _neo4j_get_relations(self, entity_names: List[str]) -> Optional[List[str]]:
+        """按实体名查询一跳关系，失败时返回 None"""
+        if not self.neo4j_driver or not entity_names:
+            return None
         
+        # 每个种子名先经 entity_name 索引定位 (index seek)，再从该节点做一次无向展开；
+        # 方向由 startNode/endNode 还原，无需 OR 或双向 UNION
         cypher = """
-        MATCH (s:Entity)-[r]-(t:Entity)
-        WHERE s.name IN $names
-        RETURN s.name as source, type(r) as rel, t.name as target
-        LIMIT 15
+        UNWIND $names AS n
+        MATCH (s:Entity {name: n})
+        MATCH (s)-[r]-(t:Entity)
+        RETURN DISTINCT startNode(r).name AS source, type(r) AS rel, endNode(r).name AS target
+        LIMIT $lim
         """
         
         try:
-            records = self.neo4j_driver.execute_query(cypher, {"names": entity_names})
-            data = getattr(records, 'records', records)
-            if not data: return "无直接关联信息"
-
-            relations = []
-            for record in data:
-                src = record.get('source') if isinstance(record, dict) else record['source']
-                rel = record.get('rel') if isinstance(record, dict) else record['rel']
-                tgt = record.get('target') if isinstance(record, dict) else record['target']
-                relations.append(f"{src} -[{rel}]-> {tgt}")
+            records = await self.neo4j_driver.aexecute_query(
+                cypher, {"names": entity_names, "lim": GRAPH_RELATION_LIMIT}
+            )
+            relations = [f"{r['source']} -[{r['rel']}]-> {r['target']}" for r in records]
             
-            return "\n".join(relations)
+            return relations
         except Exception as e:
             logger.warning(f"Neo4j查询失败: {e}")
-            return ""
+            return None
 
 hybrid_search_service = None
 
@@ -237,7 +439,10 @@ if __name__ == "__main__":
             tests = [
                 "马斯克的太空公司是什么",
                 "SpaceX和星舰的关系", 
-                "特斯拉在中国建厂了吗"
+                "特斯拉在中国建厂了吗",
+                # 短查询快速通道：实体名应命中，闲聊/多实体短语应回退 LLM 抽取
+                "SpaceX", "马斯克", "SpaceX Starship launch",
+                "继续", "详细说说", "介绍一下", "再来一个", "你好", "hello", "thanks!"
             ]
             for query in tests:
                 print(f"\n{'='*60}")
@@ -1,10 +1,16 @@
 # app/services/llm_factory.py
+import importlib.util
+import time
 from typing import Literal
+import httpx
 from langchain_openai import ChatOpenAI
 from langchain_core.language_models import BaseChatModel
 from app.core.config import settings
 from app.core.logger import logger
 
+# LLM 长连接保活时间 (秒)，预热在该时间窗内只做一次
+LLM_KEEPALIVE_SECONDS = 60
+
 class LLMFactory:
     """
     LLM 工厂类
@@ -12,6 +18,14 @@ class LLMFactory:
     支持 create_agent 高层 API 和低层 ChatOpenAI 使用
     """
     def __init__(self):
+        # 所有模型共享一个异步连接池，检索阶段预热的连接可直接被生成阶段复用
+        # 安装了 h2 时启用 HTTP/2 多路复用
+        self.http_async_client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(keepalive_expiry=LLM_KEEPALIVE_SECONDS)
+        )
+        self._last_warmup = 0.0
+
         self.fast_model = self.init_llm(mode="fast")
         self.smart_model = self.init_llm(mode="smart")
         self.strict_model = self.init_llm(mode="strict")
@@ -75,7 +89,8 @@ class LLMFactory:
                 api_key=settings.LLM_API_KEY,
                 model=config["model"],
                 temperature=config["temperature"],
-                max_tokens=config["max_tokens"]
+                max_tokens=config["max_tokens"],
+                http_async_client=self.http_async_client
             )
 
             logger.success(
@@ -88,6 +103,24 @@ class LLMFactory:
             raise
    
     
+    async def warmup(self):
+        """
+        预热到 LLM 服务的连接 (GET /models，不产生推理开销)
+        在检索阶段后台调用，把 TCP/TLS 握手藏在检索耗时之后
+        """
+        now = time.monotonic()
+        if now - self._last_warmup < LLM_KEEPALIVE_SECONDS:
+            return
+        self._last_warmup = now
+
+        try:
+            await self.http_async_client.get(
+                f"{settings.LLM_BASE_URL.rstrip('/')}/models",
+                headers={"Authorization": f"Bearer {settings.LLM_API_KEY}"}
+            )
+        except Exception as e:
+            logger.debug(f"LLM 连接预热失败 (忽略): {e}")
+
     @staticmethod
     def get_llm(
         mode: Literal["smart", "fast", "strict"] = "smart"
@@ -1,10 +1,11 @@
 from typing import List, Dict, Any, Optional
-from neo4j import GraphDatabase, Driver
+from neo4j import GraphDatabase, Driver, AsyncGraphDatabase, AsyncDriver
 from app.core.config import settings
 from app.core.logger import logger
 
 class Neo4jManager:
     _driver: Driver = None
+    _async_driver: AsyncDriver = None
 
     def __init__(self):
         """初始化连接"""
@@ -22,17 +23,40 @@ class Neo4jManager:
             )
             # 验证连接
             self._driver.verify_connectivity()
+            # 异步驱动供检索热路径使用，避免同步查询阻塞事件循环
+            self._async_driver = AsyncGraphDatabase.driver(
+                self.uri,
+                auth=(self.user, self.password)
+            )
             logger.success(f"✅ Neo4j 连接成功: {self.uri}")
         except Exception as e:
             logger.error(f"❌ Neo4j 连接失败: {e}")
             raise e
 
+        self._ensure_indexes()
+
+    def _ensure_indexes(self):
+        """创建检索依赖的索引 (幂等)，让按实体名查询走 index seek"""
+        try:
+            self._driver.execute_query(
+                "CREATE INDEX entity_name IF NOT EXISTS FOR (e:Entity) ON (e.name)",
+                database_="neo4j"
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Neo4j 索引创建失败: {e}")
+
     def close(self):
         """关闭连接"""
         if self._driver:
             self._driver.close()
             logger.info("Neo4j 连接已关闭")
 
+    async def aclose(self):
+        """关闭连接 (含异步驱动)"""
+        if self._async_driver:
+            await self._async_driver.close()
+        self.close()
+
     def execute_query(self, query: str, parameters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """
         执行 Cypher 查询并返回字典列表
@@ -71,6 +95,26 @@ class Neo4jManager:
             # 这里可以选择 raise e 或者返回空列表，视业务需求而定
             raise e
 
+    async def aexecute_query(self, query: str, parameters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """
+        execute_query 的异步版本，不阻塞事件循环
+        
+        Returns:
+            List[Dict]: 结果列表，每项都是一个纯 Python 字典
+        """
+        if not self._async_driver:
+            logger.warning("⚠️ 驱动未检测到，尝试重新连接...")
+            self._connect()
+
+        try:
+            async with self._async_driver.session(database="neo4j") as session:
+                result = await session.run(query, parameters or {})
+                return [record.data() async for record in result]
+
+        except Exception as e:
+            logger.error(f"❌ Cypher 执行出错:\nQuery: {query}\nError: {e}")
+            raise e
+
     # --- 👇 GraphRAG 常用辅助功能 👇 ---
 
     def clear_database(self):
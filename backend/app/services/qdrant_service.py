@@ -1,4 +1,4 @@
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, AsyncQdrantClient
 from qdrant_client.http import models
 from app.services.embedding_factory import embedding_factory
 from app.core.config import settings
@@ -7,11 +7,24 @@ import uuid
 
 from typing import List, Dict, Any, Optional
 
+# LangChain QdrantVectorStore 把 Document.metadata 存在 payload["metadata"] 下
+ENTITY_TYPE_FIELD = "metadata.type"
+
+# 实体集合索引参数：4096 维向量每条 16KiB，原始向量放磁盘，INT8 量化向量常驻内存
+HNSW_M = 16
+HNSW_EF_CONSTRUCT = 128
+
 class QdrantManager:
     _client: QdrantClient = None
 
     def __init__(self):
         self.client = None
+        self.async_client = None
+
+    @staticmethod
+    def _is_remote() -> bool:
+        """QDRANT_URL 为 http(s) 地址时连接服务端，否则视为本地存储路径"""
+        return settings.QDRANT_URL.startswith(("http://", "https://"))
 
     def get_client(self):
         # 懒加载：第一次被调用时才连接
@@ -19,11 +32,33 @@ class QdrantManager:
             self._connect()
         return self.client
 
+    def get_async_client(self) -> Optional[AsyncQdrantClient]:
+        """
+        获取全局复用的异步客户端 (检索热路径使用，gRPC 连接)
+        本地模式下存储目录只能被一个实例持有，返回 None，由调用方退回同步客户端
+        """
+        if self.async_client is None and self._is_remote():
+            self.async_client = AsyncQdrantClient(
+                url=settings.QDRANT_URL,
+                api_key=settings.QDRANT_API_KEY,
+                prefer_grpc=True
+            )
+            logger.success(f"✅ Qdrant 异步客户端初始化成功: {settings.QDRANT_URL}")
+        return self.async_client
+
+    async def aclose(self):
+        """关闭异步客户端"""
+        if self.async_client:
+            await self.async_client.close()
+            self.async_client = None
+
     def _connect(self):
         try:
-            # 你的本地路径配置
-            self.client = QdrantClient(path="./qdrant_data")
-            logger.success(f"✅ Qdrant 客户端初始化成功: ./qdrant_data")
+            if self._is_remote():
+                self.client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
+            else:
+                self.client = QdrantClient(path=settings.QDRANT_URL)
+            logger.success(f"✅ Qdrant 客户端初始化成功: {settings.QDRANT_URL}")
         except Exception as e:
             logger.error(f"❌ Qdrant 初始化失败: {e}")
             # 抛出异常，让上层感知
@@ -49,6 +84,36 @@ class QdrantManager:
         else:
             logger.info(f"集合已存在: {collection_name}")
 
+    def create_entity_collection(self, collection_name: str, vector_size: Optional[int] = None):
+        """创建实体集合：HNSW 参数 + INT8 标量量化 + 过滤字段索引"""
+        self.get_client().create_collection(
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(
+                size=vector_size or settings.EMBD_DIMENSIONS,
+                distance=models.Distance.COSINE,
+                on_disk=True
+            ),
+            hnsw_config=models.HnswConfigDiff(m=HNSW_M, ef_construct=HNSW_EF_CONSTRUCT),
+            quantization_config=models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    always_ram=True
+                )
+            )
+        )
+        self.create_payload_indexes(collection_name)
+
+    def create_payload_indexes(self, collection_name: str):
+        """为检索时的过滤字段建立 payload 索引，使过滤在服务端完成"""
+        try:
+            self.get_client().create_payload_index(
+                collection_name=collection_name,
+                field_name=ENTITY_TYPE_FIELD,
+                field_schema=models.PayloadSchemaType.KEYWORD
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ payload 索引创建失败: {e}")
+
     def upsert_vectors(self, 
                        collection_name: str,
                        vectors: List[List[float]], 